@@ -1,4 +1,5 @@
 import os
+import re
 import warnings
 from dataclasses import dataclass, field
 from typing import List, Dict
@@ -29,6 +30,8 @@ load_env()
 def get_env(name, default=None):
     return os.getenv(name, default)
 
+STREAM_KEY_RE = re.compile(r"^YOUTUBE_STREAM_KEY_(\d+)$")
+
 def get_list_env(name, delimiter=","):
     val = get_env(name, "")
     if not val:
@@ -48,7 +51,7 @@ class Settings:
     
     youtube_upload_enabled: bool = field(default_factory=lambda: get_env("YOUTUBE_UPLOAD_ENABLED", "false").lower() == "true")
     
-    web_port: int = field(default_factory=lambda: int(get_env("WEB_PORT")))
+    web_port: int = field(default_factory=lambda: int(get_env("WEB_PORT", "2126")))
     control_dir: str = "/tmp/nvr-control"
     static_dir: str = os.path.abspath("./web")
     log_file: str = field(default_factory=lambda: get_env("LOG_FILE"))
@@ -68,8 +71,9 @@ class Settings:
     ffmpeg_vf_args: str = field(default_factory=lambda: get_env("FFMPEG_VF_ARGS", ""))
     
     # --- go2rtc ---
-    go2rtc_api_port: int = field(default_factory=lambda: int(get_env("GO2RTC_API_PORT")))
-    go2rtc_rtsp_port: int = field(default_factory=lambda: int(get_env("GO2RTC_RTSP_PORT")))
+    go2rtc_api_port: int = field(default_factory=lambda: int(get_env("GO2RTC_API_PORT", "2127")))
+    go2rtc_rtsp_port: int = field(default_factory=lambda: int(get_env("GO2RTC_RTSP_PORT", "8554")))
+    hf_bucket: str = field(default_factory=lambda: get_env("HF_BUCKET", ""))
     
     @property
     def go2rtc_api_url(self) -> str:
@@ -78,9 +82,8 @@ class Settings:
     @property
     def hf_bucket_url(self) -> str:
         """HuggingFace CDN base URL for direct video playback."""
-        bucket = getattr(self, '_hf_bucket', None) or get_env("HF_BUCKET", "")
-        if bucket:
-            return f"https://huggingface.co/buckets/{bucket}/resolve/"
+        if self.hf_bucket:
+            return f"https://huggingface.co/buckets/{self.hf_bucket}/resolve/"
         return ""
     
     # --- YouTube Streaming ---
@@ -91,6 +94,9 @@ class Settings:
     youtube_grid: int = field(default_factory=lambda: int(get_env("YOUTUBE_GRID", "4")))
     youtube_stream_hw_accel: bool = field(default_factory=lambda: get_env("YOUTUBE_STREAM_HW_ACCEL", "false").lower() == "true")
     youtube_stream_hw_device: str = field(default_factory=lambda: get_env("YOUTUBE_STREAM_HW_DEVICE", "/dev/dri/renderD128"))
+    youtube_stream_hw_type: str = field(default_factory=lambda: get_env("YOUTUBE_STREAM_HW_TYPE", "vaapi").lower())
+    youtube_stream_cpu_pinning: bool = field(default_factory=lambda: get_env("YOUTUBE_STREAM_CPU_PINNING", "false").lower() == "true")
+    youtube_singlecam_copy: bool = field(default_factory=lambda: get_env("YOUTUBE_SINGLECAM_COPY", "false").lower() == "true")
     
     # --- YouTube Upload ---
     youtube_video_privacy: str = field(default_factory=lambda: get_env("YOUTUBE_VIDEO_PRIVACY", "unlisted"))
@@ -118,12 +124,14 @@ class Settings:
         # Process Channels
         self.num_channels = int(self.num_channels) if self.num_channels else 0
         
-        # Stream Keys
-        self.youtube_stream_keys = {}
-        for i in range(1, 9):
-            key = get_env(f"YOUTUBE_STREAM_KEY_{i}")
-            if key:
-                self.youtube_stream_keys[i] = key
+        # Stream Keys - one pass over the environment, ordered by numeric suffix
+        keys = []
+        for name, value in os.environ.items():
+            m = STREAM_KEY_RE.match(name)
+            if m and value:
+                keys.append((int(m.group(1)), value))
+        keys.sort()
+        self.youtube_stream_keys = dict(keys)
                 
         # YouTube Accounts (with per-account credentials)
         self.youtube_accounts = []
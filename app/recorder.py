@@ -4,7 +4,6 @@ import os
 import re
 import json
 import asyncio
-import glob
 from datetime import datetime
 from core import config
 from core.logger import setup_logger
@@ -52,18 +51,24 @@ def get_output_dir(base_dir, channel):
 
 def get_latest_file(out_dir, channel):
     """Get the latest recording file (TS segment or legacy MP4) for a channel."""
-    # Check for HLS segments (.ts) or legacy MP4 files
-    files = glob.glob(os.path.join(out_dir, "*.ts")) + glob.glob(os.path.join(out_dir, "*.mp4"))
-    
-    def safe_getctime(path):
-        try:
-            return os.path.getctime(path)
-        except OSError:
-            return 0
-            
-    if files:
-        return max(files, key=safe_getctime)
-    return None
+    # Check for HLS segments (.ts) or legacy MP4 files in one scandir pass,
+    # keeping a running newest-by-mtime (one stat per file, no glob re-stat)
+    latest = None
+    latest_mtime = -1.0
+    try:
+        with os.scandir(out_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(('.ts', '.mp4')):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if mtime > latest_mtime:
+                    latest, latest_mtime = entry.path, mtime
+    except OSError:
+        pass
+    return latest
 
 
 def probe_stream_info(ts_path):
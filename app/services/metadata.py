@@ -1,6 +1,7 @@
 import os
 import json
 import time
+import threading
 
 class MetadataCache:
     # Entries older than this will be cleaned up
@@ -9,7 +10,9 @@ class MetadataCache:
     def __init__(self, cache_file):
         self.cache_file = cache_file
         self.cache = {}
-        self.load()
+        # Loaded on first lookup, not at import time
+        self._loaded = False
+        self._load_lock = threading.Lock()
         
     def load(self):
         if os.path.exists(self.cache_file):
@@ -19,11 +22,19 @@ class MetadataCache:
                 self._cleanup_old_entries()
             except (json.JSONDecodeError, OSError, IOError):
                 self.cache = {}
+        self._loaded = True
+    
+    def _ensure_loaded(self):
+        # Lookups come from request threads; load the file only once
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load()
                 
     def save(self):
         try:
             with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f)
+                json.dump(self.cache, f, separators=(',', ':'))
         except (OSError, IOError):
             pass
     
@@ -53,14 +64,17 @@ class MetadataCache:
             self.save()
             
     def get_duration(self, path, size, mtime):
+        self._ensure_loaded()
         # Key: path + size + mtime (in case file is replaced)
         key = f"{path}_{size}_{mtime}"
         return self.cache.get(key)
         
-    def set_duration(self, path, size, mtime, duration):
+    def set_duration(self, path, size, mtime, duration, save=True):
+        self._ensure_loaded()
         key = f"{path}_{size}_{mtime}"
         self.cache[key] = duration
-        # Save on every write is safe for low concurrency app, 
-        # but could be optimized to save periodically if needed.
-        self.save()
+        # Save on every write is safe for low concurrency app;
+        # batch writers pass save=False and call save() once at the end.
+        if save:
+            self.save()
 
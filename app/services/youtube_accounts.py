@@ -115,7 +115,9 @@ class YouTubeAccount:
         
         try:
             def _fetch():
-                return service.channels().list(part="snippet", mine=True).execute()
+                return service.channels().list(
+                    part="snippet", mine=True, fields="items/snippet/title"
+                ).execute()
             response = await asyncio.to_thread(_fetch)
             if response.get("items"):
                 self.channel_name = response["items"][0]["snippet"]["title"]
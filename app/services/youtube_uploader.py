@@ -17,7 +17,10 @@ from services.youtube_accounts import YouTubeAccountManager
 from utils.processed_videos_csv import (
     get_pending_by_channel,
     mark_uploaded,
-    delete_uploaded_files
+    delete_uploaded_files,
+    VIDEO_PATH,
+    SIZE_MB,
+    Row
 )
 from core.config import settings
 
@@ -132,13 +135,13 @@ class YouTubeUploaderService:
                 except OSError:
                     pass
     
-    def _parse_batch_metadata(self, rows: List[dict]) -> dict:
+    def _parse_batch_metadata(self, rows: List[Row]) -> dict:
         """Parse metadata from a batch of video rows."""
         if not rows:
             return {}
         
-        first_path = rows[0]["video_path"]
-        last_path = rows[-1]["video_path"]
+        first_path = rows[0][VIDEO_PATH]
+        last_path = rows[-1][VIDEO_PATH]
         
         # Parse: ch1/2026-01-03/193627.ts
         parts = first_path.split("/")
@@ -160,7 +163,7 @@ class YouTubeUploaderService:
             "segment_count": len(rows)
         }
     
-    async def _upload_batch(self, rows: List[dict], account_id: int = 1) -> Optional[str]:
+    async def _upload_batch(self, rows: List[Row], account_id: int = 1) -> Optional[str]:
         """
         Upload a batch of TS segments to YouTube.
         Returns video ID if successful.
@@ -170,7 +173,7 @@ class YouTubeUploaderService:
         
         # Get full paths
         ts_paths = [
-            os.path.join(self.recordings_dir, row["video_path"])
+            os.path.join(self.recordings_dir, row[VIDEO_PATH])
             for row in rows
         ]
         
@@ -252,7 +255,7 @@ class YouTubeUploaderService:
                 logger.info(f"Uploaded: https://youtube.com/watch?v={video_id}")
                 
                 # Mark all segments as uploaded in CSV
-                video_paths = [row["video_path"] for row in rows]
+                video_paths = [row[VIDEO_PATH] for row in rows]
                 await asyncio.to_thread(mark_uploaded, video_paths)
                 
                 self.upload_count += 1
@@ -270,7 +273,7 @@ class YouTubeUploaderService:
         
         return None
     
-    def _get_batch_for_channel(self, rows: List[dict]) -> Optional[List[dict]]:
+    def _get_batch_for_channel(self, rows: List[Row]) -> Optional[List[Row]]:
         """
         Get a batch ready for upload from a channel's pending rows.
         Returns batch if cumulative size >= threshold, None otherwise.
@@ -279,7 +282,7 @@ class YouTubeUploaderService:
         total_size = 0.0
         
         for row in rows:
-            size = float(row.get("size_mb", 0))
+            size = float(row[SIZE_MB] or 0)
             batch.append(row)
             total_size += size
             
@@ -48,6 +48,10 @@ def main():
         '-o', 'StrictHostKeyChecking=no',
         '-o', 'BatchMode=yes',
         '-o', 'ConnectTimeout=10',
+        # Reuse one master connection across invocations (skips TCP + key exchange)
+        '-o', 'ControlMaster=auto',
+        '-o', f'ControlPath={settings.control_dir}/ssh-%r@%h:%p',
+        '-o', 'ControlPersist=10m',
         f'{ssh_user}@host.docker.internal',
         host_cmd
     ]
@@ -6,12 +6,17 @@ Tracks compression and upload status for TS recordings.
 import os
 import csv
 import threading
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from collections import defaultdict
 
 CSV_PATH = "/recordings/processed_videos.csv"
 COLUMNS = ["video_path", "size_mb", "upload_status"]
 
+# Row tuple indices (rows are positional, matching COLUMNS order)
+VIDEO_PATH, SIZE_MB, UPLOAD_STATUS = range(len(COLUMNS))
+
+Row = Tuple[str, str, str]
+
 # Thread lock for CSV operations
 _csv_lock = threading.Lock()
 
@@ -21,24 +26,26 @@ def _ensure_csv_exists():
     if not os.path.exists(CSV_PATH):
         os.makedirs(os.path.dirname(CSV_PATH), exist_ok=True)
         with open(CSV_PATH, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=COLUMNS)
-            writer.writeheader()
+            csv.writer(f).writerow(COLUMNS)
 
 
-def _read_csv() -> List[dict]:
-    """Read all rows from CSV."""
+def _read_csv() -> List[Row]:
+    """Read all rows from CSV (header skipped), padded/trimmed to len(COLUMNS)."""
     _ensure_csv_exists()
+    pad = ("",) * len(COLUMNS)
     with open(CSV_PATH, "r", newline="") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+        reader = csv.reader(f)
+        next(reader, None)
+        # Short rows (truncated or hand-edited lines) are padded with ""
+        return [(tuple(row) + pad)[:len(COLUMNS)] for row in reader if row]
 
 
-def _write_csv(rows: List[dict]):
+def _write_csv(rows: List[Row]):
     """Write all rows to CSV (overwrites)."""
     _ensure_csv_exists()
     with open(CSV_PATH, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=COLUMNS)
-        writer.writeheader()
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
         writer.writerows(rows)
 
 
@@ -48,7 +55,7 @@ def is_in_csv(video_path: str) -> bool:
         rows = _read_csv()
         # Normalize path for comparison
         video_path = video_path.lstrip("/")
-        return any(row["video_path"] == video_path for row in rows)
+        return any(row[VIDEO_PATH] == video_path for row in rows)
 
 
 def add_to_csv(video_path: str, size_mb: float):
@@ -60,14 +67,9 @@ def add_to_csv(video_path: str, size_mb: float):
         if video_path.startswith("recordings/"):
             video_path = video_path[len("recordings/"):]
         
-        # Append to CSV
+        # Append to CSV (paths are chN/YYYY-MM-DD/HHMMSS.ts, never need quoting)
         with open(CSV_PATH, "a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=COLUMNS)
-            writer.writerow({
-                "video_path": video_path,
-                "size_mb": f"{size_mb:.2f}",
-                "upload_status": ""
-            })
+            f.write(f"{video_path},{size_mb:.2f},\r\n")
 
 
 def mark_uploaded(video_paths: List[str]):
@@ -84,20 +86,21 @@ def mark_uploaded(video_paths: List[str]):
             normalized_paths.add(p)
         
         # Update status
-        for row in rows:
-            if row["video_path"] in normalized_paths:
-                row["upload_status"] = "done"
+        rows = [
+            (row[VIDEO_PATH], row[SIZE_MB], "done") if row[VIDEO_PATH] in normalized_paths else row
+            for row in rows
+        ]
         
         _write_csv(rows)
 
 
-def get_pending_uploads() -> List[dict]:
+def get_pending_uploads() -> List[Row]:
     """Get all videos pending upload (status is empty)."""
     with _csv_lock:
         rows = _read_csv()
         return [
             row for row in rows 
-            if row.get("upload_status", "") == ""
+            if row[UPLOAD_STATUS] == ""
         ]
 
 
@@ -106,12 +109,12 @@ def get_uploaded_videos() -> List[str]:
     with _csv_lock:
         rows = _read_csv()
         return [
-            row["video_path"] for row in rows
-            if row.get("upload_status") == "done"
+            row[VIDEO_PATH] for row in rows
+            if row[UPLOAD_STATUS] == "done"
         ]
 
 
-def get_pending_by_channel() -> Dict[str, List[dict]]:
+def get_pending_by_channel() -> Dict[str, List[Row]]:
     """
     Get pending uploads grouped by channel.
     Returns dict like: {"ch1": [row1, row2, ...], "ch2": [...]}
@@ -123,14 +126,14 @@ def get_pending_by_channel() -> Dict[str, List[dict]]:
     by_channel = defaultdict(list)
     for row in pending:
         # Extract channel from path: ch1/2026-01-03/193627.ts
-        parts = row["video_path"].split("/")
+        parts = row[VIDEO_PATH].split("/")
         if len(parts) >= 1:
             channel = parts[0]  # "ch1"
             by_channel[channel].append(row)
     
     # Sort each channel's files by path (chronological order)
     for channel in by_channel:
-        by_channel[channel].sort(key=lambda r: r["video_path"])
+        by_channel[channel].sort(key=lambda r: r[VIDEO_PATH])
     
     return dict(by_channel)
 
@@ -142,13 +145,12 @@ def delete_uploaded_files(recordings_dir: str = "/recordings"):
         remaining = []
         
         for row in rows:
-            if row.get("upload_status") == "done":
-                full_path = os.path.join(recordings_dir, row["video_path"])
+            if row[UPLOAD_STATUS] == "done":
+                full_path = os.path.join(recordings_dir, row[VIDEO_PATH])
                 try:
-                    if os.path.exists(full_path):
-                        os.remove(full_path)
+                    os.remove(full_path)
                 except OSError:
-                    pass
+                    pass  # Already gone (or not removable) - drop from CSV anyway
                 # Don't add to remaining (remove from CSV)
             else:
                 remaining.append(row)
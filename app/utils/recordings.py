@@ -1,8 +1,11 @@
 import os
-import glob
+import operator
 import time
 import subprocess
 import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from core.config import settings
 from core.logger import setup_logger
 from utils.helpers import is_file_live, parse_filename, format_size
@@ -16,10 +19,17 @@ from utils.naming_conventions import (
 logger = setup_logger("recordings")
 meta_cache = MetadataCache(os.path.join(settings.record_dir, "metadata_cache.json"))
 
+# Parsed YouTube CSVs: path -> ((size, mtime), entries), least recently used first
+CSV_CACHE_SIZE = 64
+_csv_cache = OrderedDict()
+_csv_cache_lock = threading.Lock()  # Endpoints call in via asyncio.to_thread
+
 def get_video_duration(filepath):
     """
     Get duration. Optimized to be skipped for older files if needed 
     to prevent API timeout on large directories.
+    Not memoized: successful results are stored in meta_cache, and a
+    failed or timed-out probe should be retried on the next request.
     """
     try:
         # Fast estimation based on file size if it matches expected bitrate could go here
@@ -36,46 +46,69 @@ def get_video_duration(filepath):
     return None
 
 
-def get_live_channels():
-    channels = {}
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
-    for ch in settings.get_active_channels():
-        today_dir = os.path.join(settings.record_dir, f"ch{ch}", today)
-        status = "OFF"
-        file_path = None
-        
-        latest_file = None
-        if os.path.exists(today_dir):
-            try:
-                # Use scandir and avoid stat() calls to prevent NFS timeouts
-                # HLS segment filenames are HHMMSS.ts, which sort chronologically
-                ts_files = [e.name for e in os.scandir(today_dir) if e.name.endswith('.ts')]
-                if ts_files:
-                    latest_name = max(ts_files)
-                    latest_file = os.path.join(today_dir, latest_name)
-            except OSError:
-                pass
-                
-        if latest_file:
-            is_live = is_file_live(latest_file)
-            
-            # Determine logic status
-            stop_file = os.path.join(settings.control_dir, f"stop_ch{ch}")
-            if os.path.exists(stop_file):
-                status = "OFF"
-            elif is_live:
-                status = "LIVE"
-            else:
-                status = "REC" 
+# Newest segment per channel: ch -> (today_dir, dir_mtime, latest_name)
+_live_scan_cache = {}
+
+def _get_live_channel(ch, today):
+    """Live status of a single channel for today's date."""
+    today_dir = os.path.join(settings.record_dir, f"ch{ch}", today)
+    status = "OFF"
+    file_path = None
+    
+    latest_file = None
+    try:
+        # Creating a segment bumps the directory mtime, so an unchanged mtime
+        # means the previous scan is still valid. Very recent mtimes are
+        # rescanned since coarse (NFS) timestamps can hide a second change.
+        dir_mtime = os.stat(today_dir).st_mtime
+        cached = _live_scan_cache.get(ch)
+        if cached and cached[0] == today_dir and cached[1] == dir_mtime and time.time() - dir_mtime > 2:
+            latest_name = cached[2]
+        else:
+            # Use scandir and avoid stat() calls to prevent NFS timeouts
+            # HLS segment filenames are HHMMSS.ts, which sort chronologically,
+            # so the newest segment is tracked by name in a single pass.
+            latest_name = None
+            with os.scandir(today_dir) as it:
+                for e in it:
+                    name = e.name
+                    if name.endswith('.ts') and (latest_name is None or name > latest_name):
+                        latest_name = name
+            _live_scan_cache[ch] = (today_dir, dir_mtime, latest_name)
+        if latest_name:
+            latest_file = os.path.join(today_dir, latest_name)
+    except OSError:
+        pass
             
-            # Relative path for frontend
-            file_path = os.path.relpath(latest_file, settings.record_dir)
+    if latest_file:
+        # Only the newest segment is stat'ed
+        is_live = is_file_live(latest_file)
+        
+        # Determine logic status
+        stop_file = os.path.join(settings.control_dir, f"stop_ch{ch}")
+        if os.path.exists(stop_file):
+            status = "OFF"
+        elif is_live:
+            status = "LIVE"
+        else:
+            status = "REC" 
         
-        channels[ch] = {
-            "status": status,
-            "file": file_path if status != "OFF" else None
-        }
-    return channels
+        # Relative path for frontend
+        file_path = os.path.relpath(latest_file, settings.record_dir)
+    
+    return ch, {
+        "status": status,
+        "file": file_path if status != "OFF" else None
+    }
+
+def get_live_channels():
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    active = settings.get_active_channels()
+    if not active:
+        return {}
+    # Channels are independent and I/O bound (NFS-backed dirs), so scan them concurrently
+    with ThreadPoolExecutor(max_workers=min(16, len(active))) as ex:
+        return dict(ex.map(lambda ch: _get_live_channel(ch, today), active))
 
 def get_available_dates(channel=None):
     t0 = time.time()
@@ -83,20 +116,26 @@ def get_available_dates(channel=None):
     
     # Identify which directories to sweep
     target_dirs = []
+    # (date_str, path) of YouTube upload CSVs, found in the same root scan
+    csv_files = []
     
     if channel:
-        ch_path = os.path.join(settings.record_dir, f"ch{channel}")
-        if os.path.exists(ch_path):
-            target_dirs.append(ch_path)
-    else:
-        # Find all channel folders
-        try:
-            with os.scandir(settings.record_dir) as it:
-                for entry in it:
-                    if entry.is_dir() and entry.name.startswith("ch"):
-                        target_dirs.append(entry.path)
-        except OSError:
-            pass
+        # A missing channel dir is handled by the scandir OSError below
+        target_dirs.append(os.path.join(settings.record_dir, f"ch{channel}"))
+
+    # One pass over the root finds channel folders and upload CSVs
+    try:
+        with os.scandir(settings.record_dir) as it:
+            for entry in it:
+                name = entry.name
+                if name.startswith("youtube_uploads_"):
+                    date_str = parse_youtube_csv_filename(name)
+                    if date_str:
+                        csv_files.append((date_str, entry.path))
+                elif not channel and name.startswith("ch") and entry.is_dir():
+                    target_dirs.append(entry.path)
+    except OSError:
+        pass
 
     t1 = time.time()
     
@@ -104,26 +143,21 @@ def get_available_dates(channel=None):
     items_count = 0
     for d in target_dirs:
         try:
-            # os.listdir is fast for getting direct children
-            items = os.listdir(d) 
-            items_count += len(items)
-            
-            for name in items:
-                # Basic validation yyyy-mm-dd
-                if len(name) == 10 and name[4] == '-' and name[7] == '-':
-                    dates.add(name)
+            # scandir gives the entry type from readdir, so files named
+            # like a date are skipped without an extra stat
+            with os.scandir(d) as it:
+                for entry in it:
+                    items_count += 1
+                    name = entry.name
+                    # Basic validation yyyy-mm-dd
+                    if len(name) == 10 and name[4] == '-' and name[7] == '-' and entry.is_dir(follow_symlinks=False):
+                        dates.add(name)
         except OSError:
             pass
             
     # Scan CSV files for cloud-only dates (or if local files are missing)
     try:
-        pattern = os.path.join(settings.record_dir, "youtube_uploads_*.csv")
-        for csv_file in glob.glob(pattern):
-            # Extract date from filename
-            date_str = parse_youtube_csv_filename(csv_file)
-            if not date_str:
-                continue
-            
+        for date_str, csv_file in csv_files:
             # If date already found locally, skip expensive CSV read
             if date_str in dates:
                 continue
@@ -133,12 +167,9 @@ def get_available_dates(channel=None):
                 target_cam = f"Channel {channel}"
                 found_match = False
                 try:
-                    with open(csv_file, 'r') as f:
-                        for line in f:
-                            data = parse_youtube_csv_line(line)
-                            if data and data['camera'] == target_cam:
-                                found_match = True
-                                break
+                    found_match = any(
+                        data['camera'] == target_cam for data in _read_youtube_csv(csv_file)
+                    )
                 except Exception:
                     pass
                 
@@ -156,6 +187,33 @@ def get_available_dates(channel=None):
     return sorted(list(dates), reverse=True)
 
 
+def _read_youtube_csv(csv_path):
+    """
+    Parse a YouTube uploads CSV into a list of entry dicts.
+    Daily CSVs are append-only and frozen once the day is over, so the parse
+    is reused for as long as the file's size and mtime are unchanged.
+    Returned entries are shared; callers must not mutate them.
+    """
+    st = os.stat(csv_path)
+    sig = (st.st_size, st.st_mtime)
+    with _csv_cache_lock:
+        cached = _csv_cache.get(csv_path)
+        if cached and cached[0] == sig:
+            _csv_cache.move_to_end(csv_path)
+            return cached[1]
+
+    with open(csv_path, 'r') as f:
+        content = f.read()
+    entries = [data for data in map(parse_youtube_csv_line, content.splitlines()) if data]
+
+    with _csv_cache_lock:
+        _csv_cache[csv_path] = (sig, entries)
+        _csv_cache.move_to_end(csv_path)
+        while len(_csv_cache) > CSV_CACHE_SIZE:
+            _csv_cache.popitem(last=False)
+    return entries
+
+
 def _get_youtube_entries_for_date(date, channel):
     """
     Get YouTube entries for a specific date and channel.
@@ -167,28 +225,37 @@ def _get_youtube_entries_for_date(date, channel):
     # No more global scanning of all CSVs
     csv_path = get_youtube_csv_filename(settings.record_dir, date)
     
-    if os.path.exists(csv_path):
-        target_cam = f"Channel {channel}"
-        try:
-            with open(csv_path, 'r') as f:
-                for line in f:
-                    data = parse_youtube_csv_line(line)
-                    if data:
-                        # Check camera match
-                        # data['camera'] should be "Channel X"
-                        if data['camera'] == target_cam:
-                            entries.append(data)
-                        # Fallback for old CSVs without camera column?
-                        # If old CSV, camera is "Unknown".
-                        # If user asks for Channel 1, "Unknown" won't match. 
-                        # This assumes new CSV format. 
-                        # If mixed content, only new entries will show up for specific channel queries.
-                        # This is acceptable per "KISS" requirement.
-        except Exception as e:
-            logger.error(f"Failed to read CSV {csv_path}: {e}")
-            
+    target_cam = f"Channel {channel}"
+    try:
+        for data in _read_youtube_csv(csv_path):
+            # Check camera match
+            # data['camera'] should be "Channel X"
+            if data['camera'] == target_cam:
+                entries.append(data)
+                # Fallback for old CSVs without camera column?
+                # If old CSV, camera is "Unknown".
+                # If user asks for Channel 1, "Unknown" won't match. 
+                # This assumes new CSV format. 
+                # If mixed content, only new entries will show up for specific channel queries.
+                # This is acceptable per "KISS" requirement.
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error(f"Failed to read CSV {csv_path}: {e}")
+        
     return entries
 
+# Recording file types listed for a day: HLS segments, MP4 and legacy MKV
+VIDEO_EXTENSIONS = (".ts", ".mp4", ".mkv")
+
+def _seconds_of_day(time_str):
+    """Convert an HH:MM:SS string to an integer sort key (0 if malformed)."""
+    try:
+        h, m, s = time_str.split(':')
+        return int(h) * 3600 + int(m) * 60 + int(s)
+    except ValueError:
+        return 0
+
 def get_recordings_for_date(ch, date):
     recordings = []
     
@@ -196,56 +263,54 @@ def get_recordings_for_date(ch, date):
     local_recs_map = {} # Key: HH:MM:SS string -> index in recordings list
     
     try:
-        # Helper to process a local file entry
-        # We inline the loop logic instead of sub-function for clarity or keep it similar
-        
+        # Candidates are (path, stat) pairs for video files only; each entry
+        # is stat'ed exactly once and the newest one is tracked as we go.
         candidates = []
+        latest_candidate = None
+        latest_mtime = -1.0
+
+        def _collect(entry, path):
+            nonlocal latest_candidate, latest_mtime
+            if not path.endswith(VIDEO_EXTENSIONS) or not entry.is_file():
+                return
+            try:
+                st = entry.stat()
+            except OSError:
+                return  # Deleted mid-scan
+            candidates.append((path, st))
+            if st.st_mtime > latest_mtime:
+                latest_candidate, latest_mtime = path, st.st_mtime
         
         # Scan Root for Flat files
+        # The root mostly holds channel dirs, CSVs and caches, so names are
+        # matched as bytes and only the hits are decoded
         target_date_flat = date.replace("-", "") # 20251226
-        with os.scandir(settings.record_dir) as it:
-            prefix = f"ch{ch}_{target_date_flat}"
+        prefix = f"ch{ch}_{target_date_flat}".encode()
+        with os.scandir(os.fsencode(settings.record_dir)) as it:
             for entry in it:
-                if entry.is_file() and entry.name.startswith(prefix):
-                    candidates.append(entry)
+                if entry.name.startswith(prefix):
+                    _collect(entry, os.fsdecode(entry.path))
 
         # Nested Structure Search
         nested_dir = os.path.join(settings.record_dir, f"ch{ch}", date)
-        if os.path.exists(nested_dir):
-            with os.scandir(nested_dir) as it:
+        try:
+            it = os.scandir(nested_dir)
+        except FileNotFoundError:
+            it = None
+        if it:
+            with it:
                 for entry in it:
-                    if entry.is_file():
-                        candidates.append(entry)
-                        
-        # Find latest candidate based on mtime (to handle edge cases with live check)
-        latest_candidate = None
-        if candidates:
-            try:
-                latest_candidate = max(candidates, key=lambda e: e.stat().st_mtime)
-            except (ValueError, OSError):
-                pass
+                    _collect(entry, entry.path)
 
-        for entry in candidates:
-             is_ts = entry.name.endswith(".ts")  # HLS segments
-             is_mp4 = entry.name.endswith(".mp4")
-             is_mkv = entry.name.endswith(".mkv")  # Legacy
-             
-             if not (is_ts or is_mp4 or is_mkv):
-                 continue
-                 
+        for full_path, stat in candidates:
              # Only show MKV if it is the latest file (likely currently recording - legacy)
-             # For TS segments, we want to show all of them as they're the new format
-             if is_mkv:
-                 is_latest = (entry == latest_candidate)
-                 if not is_latest:
-                     continue
+             # For TS segments (HLS) and MP4, we want to show all of them
+             if full_path.endswith(".mkv") and full_path != latest_candidate:
+                 continue
             
-             full_path = entry.path
              meta = parse_filename(full_path)
              if not meta or meta['date'] != date:
                  continue
-
-             stat = entry.stat()
              
              rec = {
                  "full_path": full_path,
@@ -253,7 +318,8 @@ def get_recordings_for_date(ch, date):
                  "meta": meta,
                  "size": stat.st_size,
                  "mtime": stat.st_mtime,
-                 "youtube_url": None # Will be filled if match found
+                 "youtube_url": None, # Will be filled if match found
+                 "_ts": _seconds_of_day(meta['time'])
              }
              
              recordings.append(rec)
@@ -286,36 +352,54 @@ def get_recordings_for_date(ch, date):
                 },
                 "size": 0,
                 "mtime": 0,
-                "youtube_url": url
+                "youtube_url": url,
+                "_ts": _seconds_of_day(time_key)
             })
 
-    # 4. Sort
-    recordings.sort(key=lambda x: x['meta']['datetime'])
+    # 4. Sort (all records share `date`, so seconds-of-day orders them)
+    recordings.sort(key=operator.itemgetter('_ts'))
     
     # 5. Determine Live Status & Format Result
     now = time.time()
     
-    # Find latest live candidate (checking mtime only for existing files)
-    live_index = -1
-    for i, rec in enumerate(recordings):
-        if rec['mtime'] > 0 and (now - rec['mtime']) < 15:
-            live_index = i
+    # Only the newest local file can be live (checking mtime only for existing files)
+    live_rec = next((rec for rec in reversed(recordings) if rec['mtime'] > 0), None)
+    if live_rec is not None and (now - live_rec['mtime']) >= 15:
+        live_rec = None
             
+    # Duration lookup: cache first, then probe all misses concurrently
+    # (ffprobe runs out of process, so threads overlap the subprocess waits)
+    durations = {}
+    uncached = []
+    for i, rec in enumerate(recordings):
+        if rec is live_rec or not rec['full_path']:
+            continue
+        cached_dur = meta_cache.get_duration(rec['rel_path'], rec['size'], rec['mtime'])
+        if cached_dur is not None:
+            durations[i] = cached_dur
+        else:
+            uncached.append(i)
+
+    if uncached:
+        with ThreadPoolExecutor(max_workers=min(8, len(uncached))) as ex:
+            probed = list(ex.map(
+                lambda i: get_video_duration(recordings[i]['full_path']),
+                uncached
+            ))
+        dirty = False
+        for i, dur in zip(uncached, probed):
+            if dur is not None:
+                rec = recordings[i]
+                durations[i] = dur
+                meta_cache.set_duration(rec['rel_path'], rec['size'], rec['mtime'], dur, save=False)
+                dirty = True
+        if dirty:
+            meta_cache.save()
+
     result_list = []
     for i, rec in enumerate(recordings):
-        is_live = (i == live_index)
-        
-        duration = None
-        if not is_live and rec['full_path']:
-             # Standard duration lookup
-             cached_dur = meta_cache.get_duration(rec['rel_path'], rec['size'], rec['mtime'])
-             if cached_dur is not None:
-                 duration = cached_dur
-             else:
-                 dur = get_video_duration(rec['full_path'])
-                 if dur is not None:
-                     duration = dur
-                     meta_cache.set_duration(rec['rel_path'], rec['size'], rec['mtime'], duration)
+        is_live = rec is live_rec
+        duration = durations.get(i)
 
         size_display = format_size(rec['size'])
         if rec['full_path'] is None:
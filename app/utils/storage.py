@@ -2,38 +2,86 @@
 Storage utility functions shared by cleanup and backup services.
 """
 import os
-import glob
+import heapq
 
 
 def get_size_gb(path):
     """Calculate total size of directory in GB."""
     total = 0
-    for root, _, files in os.walk(path):
-        for f in files:
-            try:
-                total += os.path.getsize(os.path.join(root, f))
-            except OSError:
-                pass
+    # scandir DirEntries carry file type from readdir, so only files are stat'ed
+    stack = [path]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
     return total / (1024 ** 3)
 
 
-def get_all_ts_files(path, sort_by="mtime"):
+def iter_ts_files(path):
+    """
+    Yield (path, stat_result) for every .ts file under a directory, recursively.
+    
+    Uses os.scandir so each file is stat'ed once and directories not at all.
+    """
+    stack = [path]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(".ts"):
+                        yield entry.path, entry.stat()
+                except OSError:
+                    pass
+
+
+def get_oldest_ts_files(path, target_bytes, exclude=()):
     """
-    Get all .ts files in a directory recursively.
+    Get the oldest .ts files (by mtime) whose sizes add up to target_bytes.
+    
+    Streams the directory tree through a bounded max-heap instead of
+    materializing and sorting every file, so memory is proportional to the
+    number of files returned rather than the size of the archive.
     
     Args:
         path: Directory to scan
-        sort_by: "mtime" (modification time) or "ctime" (creation time), oldest first
+        target_bytes: Total size the selection should cover
+        exclude: Paths to skip (e.g. files that already failed to delete)
     
     Returns:
-        List of absolute file paths sorted by time (oldest first)
+        List of (path, size) tuples, oldest first
     """
-    files = glob.glob(os.path.join(path, "**/*.ts"), recursive=True)
+    heap = []  # (-mtime, size, path): the newest kept file sits on top
+    total = 0
+    for f, st in iter_ts_files(path):
+        if f in exclude:
+            continue
+        mtime = st.st_mtime
+        if total >= target_bytes and heap and mtime >= -heap[0][0]:
+            continue  # Newer than every file already selected
+        heapq.heappush(heap, (-mtime, st.st_size, f))
+        total += st.st_size
+        # Drop the newest selections once the rest still cover the target
+        while heap and total - heap[0][1] >= target_bytes:
+            total -= heapq.heappop(heap)[1]
     
-    if sort_by == "ctime":
-        return sorted(files, key=lambda f: os.path.getctime(f))
-    else:
-        return sorted(files, key=lambda f: os.path.getmtime(f))
+    heap.sort(reverse=True)
+    return [(f, size) for _, size, f in heap]
 
 
 def cleanup_old_files(directory, max_gb, logger, cleanup_percent=0.10):
@@ -59,25 +107,34 @@ def cleanup_old_files(directory, max_gb, logger, cleanup_percent=0.10):
     deleted_bytes = 0
     deleted_count = 0
     
-    files = get_all_ts_files(directory, sort_by="mtime")
     logger.info(f"[📊] Storage {current_size:.2f} GB exceeds limit {max_gb} GB")
     logger.info(f"[🗑️] Deleting ~{target_bytes / (1024**2):.0f} MB ({cleanup_percent*100:.0f}% of {max_gb} GB)...")
     
-    for f in files:
-        if deleted_bytes >= target_bytes:
+    affected_dirs = set()
+    failed = set()
+    # Reselect after failed deletes so the next-oldest files make up the shortfall
+    while deleted_bytes < target_bytes:
+        files = get_oldest_ts_files(directory, target_bytes - deleted_bytes, exclude=failed)
+        if not files:
             break
+        for f, f_size in files:
+            try:
+                os.remove(f)
+                deleted_bytes += f_size
+                deleted_count += 1
+                affected_dirs.add(os.path.dirname(f))
+            except OSError as e:
+                failed.add(f)
+                logger.warning(f"[⚠️] Failed to delete {f}: {e}")
+    
+    # Clean empty parent directories once, deepest first
+    # (rmdir fails on non-empty dirs, so no emptiness check is needed)
+    affected_dirs.discard(directory)
+    for parent in sorted(affected_dirs, key=len, reverse=True):
         try:
-            f_size = os.path.getsize(f)
-            os.remove(f)
-            deleted_bytes += f_size
-            deleted_count += 1
-            
-            # Clean empty parent directories
-            parent = os.path.dirname(f)
-            if parent != directory and os.path.isdir(parent) and not os.listdir(parent):
-                os.rmdir(parent)
-        except OSError as e:
-            logger.warning(f"[⚠️] Failed to delete {f}: {e}")
+            os.rmdir(parent)
+        except OSError:
+            pass
     
     logger.info(f"[✓] Deleted {deleted_count} files ({deleted_bytes / (1024**2):.0f} MB)")
     return deleted_count
@@ -4,7 +4,7 @@ YouTube Live Streaming Service
 Manages FFmpeg processes to stream RTSP cameras to YouTube.
 Supports Grid mode (combining cameras) and Multi-Key mode.
 Restarts streams every 11 hours.
-Uses canvas-based approach for maximum stability.
+Composes grids with a single xstack filter.
 """
 import os
 import sys
@@ -21,6 +21,9 @@ import asyncio
 import logging
 import math
 import re
+import functools
+import subprocess
+from collections import deque
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
 from core.config import settings
@@ -30,10 +33,13 @@ from core.config import settings
 
 
 def setup_logger():
+    logger = logging.getLogger("yt_stream")
+    if logger.handlers:  # Already configured (module imported again)
+        return logger
+    
     log_dir = "/logs"
     os.makedirs(log_dir, exist_ok=True)
     
-    logger = logging.getLogger("yt_stream")
     logger.setLevel(logging.DEBUG)
     
     fmt = logging.Formatter(
@@ -41,7 +47,7 @@ def setup_logger():
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     
-    fh = RotatingFileHandler(f"{log_dir}/youtube_stream.log", maxBytes=5*1024*1024, backupCount=2)
+    fh = RotatingFileHandler(f"{log_dir}/youtube_stream.log", maxBytes=5*1024*1024, backupCount=2, delay=True)
     fh.setLevel(logging.DEBUG)
     fh.setFormatter(fmt)
     
@@ -59,13 +65,154 @@ log = setup_logger()
 # Core Logic
 # ============================================
 
+@functools.lru_cache(maxsize=None)
+def detect_hw_encoder():
+    """
+    Resolve the hardware encoder to use ("vaapi", "nvenc" or None for libx264).
+    Checked once per process: the encoder must be built into ffmpeg and its device present.
+    Blocks on an ffmpeg subprocess, so main() warms it via asyncio.to_thread.
+    """
+    if not settings.youtube_stream_hw_accel:
+        return None
+    
+    try:
+        out = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10
+        ).stdout
+    except Exception as e:
+        log.warning(f"⚠️ Could not list FFmpeg encoders ({e}), using libx264")
+        return None
+    
+    usable = {
+        "nvenc": "h264_nvenc" in out and os.path.exists("/dev/nvidia0"),
+        "vaapi": "h264_vaapi" in out and os.path.exists(settings.youtube_stream_hw_device),
+    }
+    wanted = settings.youtube_stream_hw_type
+    if wanted == "auto":
+        return next((hw for hw, ok in usable.items() if ok), None)
+    if usable.get(wanted):
+        return wanted
+    log.warning(f"⚠️ Hardware encoder '{wanted}' not available, using libx264")
+    return None
+
+# FFmpeg output indicating YouTube rejected or dropped the RTMP stream,
+# compiled into one alternation so each (lower-cased) line is scanned once
+RTMP_ERROR_RE = re.compile("|".join(re.escape(x.lower()) for x in (
+    "Connection refused",
+    "Server error",
+    "RTMP error",
+    "Failed to update header",
+    "I/O error",
+    "Broken pipe",
+    "Connection reset",
+    "Unable to write frame",
+    "Cannot read RTMP handshake",
+    "Connection timed out",
+    "End of file",
+    "Write error",
+    "Input/output error",
+)))
+
+# FFmpeg log output is read in chunks and split on CR as well as LF
+LOG_READ_CHUNK = 65536
+LOG_LINE_SPLIT_RE = re.compile(rb"[\r\n]")
+
+# Longest keyframe interval (seconds) YouTube accepts for passthrough streams
+MAX_COPY_KEYFRAME_GAP = 4.0
+
+# Per-input RTSP flags and error handling
+RTSP_INPUT_ARGS = (
+    "-rtsp_transport", "tcp",
+    "-rtsp_flags", "prefer_tcp",
+    "-timeout", "5000000",  # 5 second timeout (microseconds)
+    "-fflags", "+genpts+igndts+discardcorrupt+nobuffer",  # Better live handling
+    "-flags", "low_delay",  # Reduce latency
+    "-thread_queue_size", "1024",  # Input buffer for stability
+    "-err_detect", "ignore_err",  # Ignore decoding errors
+    "-max_delay", "500000",  # 0.5 second max delay
+    "-reorder_queue_size", "0",  # Interleaved TCP from local go2rtc arrives in order
+    "-probesize", "100000",  # go2rtc's SDP carries SPS/PPS - a short probe is enough
+    "-analyzeduration", "100000",
+)
+
+# Rate control for re-encoded video
+VIDEO_RATE_ARGS = (
+    # Bitrate settings (YouTube recommends 13.5 Mbps for 1440p)
+    "-b:v", "10000k",   # 10 Mbps target
+    "-maxrate", "12000k",  # Allow bursts up to 12 Mbps
+    "-bufsize", "16000k",  # 2 seconds of buffer at max rate
+    
+    # Frame rate and keyframe settings (CRITICAL FOR YOUTUBE)
+    "-r", "25",                     # 25 fps output
+    "-g", "50",                     # Keyframe every 2 seconds (25fps * 2)
+    "-keyint_min", "25",            # Minimum keyframe interval
+    "-sc_threshold", "0",           # Disable scene change detection
+)
+
+# Audio and container settings, followed by the RTMP URL
+OUTPUT_ARGS = (
+    # Audio settings
+    "-c:a", "aac",
+    "-b:a", "128k",
+    "-ar", "44100",                 # Force audio sample rate
+    "-ac", "2",                     # Force stereo
+    
+    # Stream settings
+    "-muxdelay", "0",               # Don't hold packets back in the muxer
+    "-muxpreload", "0",
+    "-f", "flv",
+    "-flvflags", "no_duration_filesize",
+    "-rw_timeout", "5000000",       # Fail a stalled RTMP write after 5s so the monitor restarts it
+)
+
+@functools.lru_cache(maxsize=None)
+def grid_filter(n, vaapi_upload=""):
+    """
+    Build the xstack filter_complex for an n-camera grid on a 2560x1440 canvas.
+    Depends only on n and the upload suffix, so each shape is built once per process.
+    Returns (rows, cols, cell_w, cell_h, filter_complex).
+    """
+    cols = math.ceil(math.sqrt(n))
+    rows = math.ceil(n / cols)
+    
+    # Calculate cell dimensions for 2560x1440 output
+    cell_w = 2560 // cols
+    cell_h = 1440 // rows
+    
+    filter_parts = []
+    
+    # Step 1: Normalize each camera to cell size with same settings
+    # (fps first, so frames it drops are never scaled)
+    for i in range(n):
+        filter_parts.append(
+            f"[{i}:v]fps=25,scale={cell_w}:{cell_h}:force_original_aspect_ratio=decrease,"
+            f"pad={cell_w}:{cell_h}:(ow-iw)/2:(oh-ih)/2,"
+            f"setsar=1[v{i}]"
+        )
+    
+    # Step 2: Stack all cells in one pass instead of chaining an overlay per camera.
+    # fill=black covers empty cells; a camera that dies keeps its last frame.
+    inputs = "".join(f"[v{i}]" for i in range(n))
+    layout = "|".join(f"{(i % cols) * cell_w}_{(i // cols) * cell_h}" for i in range(n))
+    stack = f"{inputs}xstack=inputs={n}:layout={layout}:fill=black"
+    
+    # Cells may not divide 2560x1440 exactly - pad the remainder
+    if cols * cell_w != 2560 or rows * cell_h != 1440:
+        stack += ",pad=2560:1440:(ow-iw)/2:(oh-ih)/2"
+    
+    filter_parts.append(f"{stack}{vaapi_upload}[v]")
+    return rows, cols, cell_w, cell_h, ";".join(filter_parts)
+
 class StreamJob:
     def __init__(self, key, cameras):
         self.key = key
         self.cameras = cameras  # List of camera indices (1-based)
+        self.key_tail = key[-4:]
+        self._str = f"Job(Key=...{self.key_tail}, Cams={cameras})"
         
     def __str__(self):
-        return f"Job(Key=...{self.key[-4:]}, Cams={self.cameras})"
+        return self._str
 
 class YouTubeStreamer:
     def __init__(self, job):
@@ -77,47 +224,137 @@ class YouTubeStreamer:
         # Stream health monitoring
         self.last_frame_time = None
         self.error_count = 0
-        self.rtmp_errors = []
+        self.rtmp_errors = deque(maxlen=32)  # Most recent RTMP error lines only
         # Frame stall detection - track actual frame count, not just output
         self.last_frame_count = 0
         self.last_frame_count_time = None
+        self._last_progress_log = 0
+        # Restart backoff (monotonic time of the next restart attempt, 0 = none pending)
+        self.consecutive_failures = 0
+        self.next_retry_at = 0
+        # CPU cores this stream's FFmpeg is pinned to (None = no pinning)
+        self.cpus = None
+        # Encoder thread count (None = let FFmpeg decide)
+        self.threads = None
+        # Video codec / keyframe gap of a single-camera source (None = not probed successfully yet)
+        self.source_codec = None
+        self.source_keyframe_gap = None
+    
+    @property
+    def copy_video(self):
+        """True when a single H.264 camera can be sent to YouTube without re-encoding"""
+        return (
+            settings.youtube_singlecam_copy
+            and len(self.job.cameras) == 1
+            and self.source_codec == "h264"
+            and self.source_keyframe_gap is not None
+            and self.source_keyframe_gap <= MAX_COPY_KEYFRAME_GAP
+        )
+    
+    async def probe_source_codec(self):
+        """
+        Probe a single-camera source: codec plus the largest keyframe gap over
+        ~6s of packets. A failed or inconclusive probe (H.264 with fewer than
+        two keyframes in the window) leaves source_codec as None so the next
+        start() tries again.
+        """
+        if self.source_codec is not None or len(self.job.cameras) != 1:
+            return
+        cam = self.job.cameras[0]
+        rtsp = f"rtsp://127.0.0.1:{settings.go2rtc_rtsp_port}/cam{cam}"
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "ffprobe", "-v", "error", "-rtsp_transport", "tcp",
+                "-select_streams", "v:0", "-read_intervals", "%+6", "-show_packets",
+                "-show_entries", "stream=codec_name:packet=pts_time,flags",
+                "-of", "csv=p=0", rtsp,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            try:
+                out, _ = await asyncio.wait_for(proc.communicate(), timeout=15)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                log.warning(f"ffprobe timed out for cam {cam}, re-encoding until the next start")
+                return
+            
+            # Packet rows are "pts_time,flags"; the stream row is just the codec name
+            codec = None
+            keyframes = []
+            for row in out.decode(errors="ignore").split():
+                pts, sep, flags = row.partition(",")
+                if not sep:
+                    codec = row
+                elif "K" in flags and pts not in ("", "N/A"):
+                    keyframes.append(float(pts))
+            if not codec:
+                log.warning(f"ffprobe found no video stream for cam {cam}, re-encoding until the next start")
+                return
+            if codec == "h264" and len(keyframes) < 2:
+                # Too few keyframes in the window to measure the GOP - inconclusive, not a verdict
+                log.warning(f"Cam {cam}: {len(keyframes)} keyframe(s) in probe window, re-encoding until the next start")
+                return
+            self.source_codec = codec
+            if len(keyframes) >= 2:
+                self.source_keyframe_gap = max(b - a for a, b in zip(keyframes, keyframes[1:]))
+            # copy_video may have changed, so the cached argv must be rebuilt
+            self._invalidate_cmd()
+            log.info(f"🔍 Cam {cam} source codec: {self.source_codec}, keyframe gap: {self.source_keyframe_gap}s")
+        except Exception as e:
+            log.warning(f"ffprobe failed for cam {cam}: {e}")
+    
+    @functools.cached_property
+    def cmd(self):
+        """FFmpeg argv for this job, cached until a source probe changes copy_video"""
+        return self.build_cmd()
+    
+    @functools.cached_property
+    def cmd_str(self):
+        return ' '.join(self.cmd)
+    
+    def _invalidate_cmd(self):
+        """Drop the cached argv so the next start() rebuilds it"""
+        self.__dict__.pop("cmd", None)
+        self.__dict__.pop("cmd_str", None)
     
     def build_cmd(self):
         rtmp = f"{settings.youtube_rtmp_url}/{self.job.key}"
+        hw = detect_hw_encoder()
         
         cmd = [
             "ffmpeg",
-            "-hide_banner", "-loglevel", "warning",
-            "-stats",  # Output encoding stats continuously (for health monitoring)
-            "-stats_period", "5",  # Stats every 5 seconds
+            "-hide_banner", "-loglevel", "error",  # Progress comes from -progress; stderr only carries errors
+            "-nostats",
+            "-progress", "pipe:1",  # key=value progress blocks on stdout (for health monitoring)
+            "-stats_period", "5",  # Progress every 5 seconds
             "-threads", "0"  # Use all CPU cores
         ]
         
         # VAAPI Hardware Acceleration Init (matching recorder.py pattern - BEFORE -i inputs)
-        # NOTE: For multiple camera inputs with complex filter_complex, we CANNOT use hwaccel for decoding
-        # because the scale/overlay filters are CPU filters. We only use VAAPI for encoding output.
-        if settings.youtube_stream_hw_accel:
+        # NOTE: The scale/xstack filters are CPU filters, so decoded frames must end up in system
+        # memory. Inputs are decoded on the GPU without -hwaccel_output_format, which makes FFmpeg
+        # download each frame for the filters (and fall back to software decode if hwaccel fails).
+        if hw == "vaapi":
             cmd.extend([
                 "-init_hw_device", f"vaapi=va:{settings.youtube_stream_hw_device}",
                 "-filter_hw_device", "va",  # Use this device for hw filters
             ])
         
+        # Hardware decode per input when a GPU encoder is in use (not needed for passthrough)
+        hwaccel_args = ()
+        if not self.copy_video:
+            if hw == "vaapi":
+                hwaccel_args = ("-hwaccel", "vaapi", "-hwaccel_device", "va")
+            elif hw == "nvenc":
+                hwaccel_args = ("-hwaccel", "cuda")
+        
         # Inputs - with proper per-input RTSP flags and error handling
         for cam_idx in self.job.cameras:
             rtsp = f"rtsp://127.0.0.1:{settings.go2rtc_rtsp_port}/cam{cam_idx}"
-            cmd.extend([
-                "-rtsp_transport", "tcp",
-                "-rtsp_flags", "prefer_tcp",
-                "-timeout", "5000000",  # 5 second timeout (microseconds)
-                "-fflags", "+genpts+igndts+discardcorrupt+nobuffer",  # Better live handling
-                "-flags", "low_delay",  # Reduce latency
-                "-thread_queue_size", "1024",  # Input buffer for stability
-                "-err_detect", "ignore_err",  # Ignore decoding errors
-                "-max_delay", "500000",  # 0.5 second max delay
-                "-probesize", "1000000",  # For stream detection
-                "-analyzeduration", "1000000",
-                "-i", rtsp
-            ])
+            cmd.extend(RTSP_INPUT_ARGS)
+            cmd.extend(hwaccel_args)
+            cmd.extend(("-i", rtsp))
             
         # Audio Source (Silent but required by YouTube)
         audio_input_idx = len(self.job.cameras)
@@ -125,77 +362,37 @@ class YouTubeStreamer:
         
         # Filter / Mapping
         # For VAAPI, we need to add hwupload at the end to transfer frames to GPU
-        vaapi_upload = ",format=nv12|vaapi,hwupload" if settings.youtube_stream_hw_accel else ""
+        vaapi_upload = ",format=nv12|vaapi,hwupload" if hw == "vaapi" else ""
         
-        if len(self.job.cameras) == 1:
+        if self.copy_video:
+            # Single H.264 camera - remux as-is, no decode/scale/encode
+            log.info("📦 Passing camera H.264 through without re-encoding")
+            cmd.extend(["-map", "0:v", "-map", f"{audio_input_idx}:a"])
+        elif len(self.job.cameras) == 1:
             # Single camera - scale to 2560x1440 with proper aspect ratio handling
-            filter_complex = f"[0:v]scale=2560:1440:force_original_aspect_ratio=decrease,pad=2560:1440:(ow-iw)/2:(oh-ih)/2,fps=25,setsar=1{vaapi_upload}[v]"
+            filter_complex = f"[0:v]fps=25,scale=2560:1440:force_original_aspect_ratio=decrease,pad=2560:1440:(ow-iw)/2:(oh-ih)/2,setsar=1{vaapi_upload}[v]"
             cmd.extend(["-filter_complex", filter_complex])
             cmd.extend(["-map", "[v]", "-map", f"{audio_input_idx}:a"])
         else:
-            # Grid Layout - CANVAS APPROACH for stability
+            # Grid Layout - single xstack pass over equally sized cells
             n = len(self.job.cameras)
-            cols = math.ceil(math.sqrt(n))
-            rows = math.ceil(n / cols)
-            
-            log.info(f"📐 Creating {rows}x{cols} grid for {n} cameras using CANVAS method")
-            
-            # Calculate cell dimensions for 2560x1440 output
-            cell_w = 2560 // cols
-            cell_h = 1440 // rows
-            
-            log.info(f"📏 Cell size: {cell_w}x{cell_h}")
+            rows, cols, cell_w, cell_h, filter_complex = grid_filter(n, vaapi_upload)
             
-            # Build filter complex with canvas approach
-            filter_parts = []
-            
-            # Step 1: Normalize each camera to cell size with same settings
-            for i in range(n):
-                filter_parts.append(
-                    f"[{i}:v]scale={cell_w}:{cell_h}:force_original_aspect_ratio=decrease,"
-                    f"pad={cell_w}:{cell_h}:(ow-iw)/2:(oh-ih)/2,"
-                    f"fps=25,setsar=1[v{i}]"
-                )
-            
-            # Step 2: Create blank canvas at 2560x1440
-            filter_parts.append(
-                f"color=c=black:s=2560x1440:r=25[base]"
-            )
-            
-            # Step 3: Overlay each normalized camera onto canvas
-            current_layer = "base"
-            for i in range(n):
-                row = i // cols
-                col = i % cols
-                x = col * cell_w
-                y = row * cell_h
-                
-                # Last overlay adds VAAPI upload if needed
-                is_last = (i == n - 1)
-                next_layer = "pre_v" if is_last and settings.youtube_stream_hw_accel else ("v" if is_last else f"tmp{i}")
-                
-                # eof_action=pass: Keep going if this camera dies
-                # repeatlast=1: Repeat last frame if camera freezes
-                filter_parts.append(
-                    f"[{current_layer}][v{i}]overlay={x}:{y}:eof_action=pass:repeatlast=1[{next_layer}]"
-                )
-                current_layer = next_layer
-            
-            # Add hwupload for VAAPI after all overlays
-            if settings.youtube_stream_hw_accel:
-                filter_parts.append("[pre_v]format=nv12|vaapi,hwupload[v]")
-            
-            filter_complex = ";".join(filter_parts)
-            
-            log.info(f"🎨 Canvas layout: {rows}x{cols} grid with {cell_w}x{cell_h} cells")
+            log.info(f"🎨 Grid layout: {rows}x{cols} grid for {n} cameras with {cell_w}x{cell_h} cells")
             log.debug(f"Filter: {filter_complex}")
             
             cmd.extend(["-filter_complex", filter_complex])
             cmd.extend(["-map", "[v]", "-map", f"{audio_input_idx}:a"])
 
+        # Size the encoder's thread pool to this stream's share of the CPUs
+        if self.threads and not self.copy_video:
+            cmd.extend(["-threads", str(self.threads)])
+
         # Encoding Settings - OPTIMIZED FOR YOUTUBE
         # Hardware acceleration or software fallback
-        if settings.youtube_stream_hw_accel:
+        if self.copy_video:
+            cmd.extend(["-c:v", "copy"])
+        elif hw == "vaapi":
             # VAAPI Hardware Encoding (Intel GPU)
             log.info(f"🎮 Using VAAPI hardware encoding (device: {settings.youtube_stream_hw_device})")
             cmd.extend([
@@ -205,6 +402,18 @@ class YouTubeStreamer:
                 "-profile:v", "main",               # Better compatibility
                 "-level", "4.2",                    # Higher resolution support
             ])
+        elif hw == "nvenc":
+            # NVENC Hardware Encoding (NVIDIA GPU) - takes CPU-filtered frames directly
+            log.info("🎮 Using NVENC hardware encoding")
+            cmd.extend([
+                "-c:v", "h264_nvenc",
+                "-preset", "p4",
+                "-tune", "ll",                      # Low latency
+                "-rc", "cbr",
+                "-profile:v", "main",
+                "-level", "4.2",
+                "-pix_fmt", "yuv420p",
+            ])
         else:
             # Software encoding (libx264)
             log.info("🖥️ Using software encoding (libx264)")
@@ -218,129 +427,153 @@ class YouTubeStreamer:
                 "-pix_fmt", "yuv420p",
             ])
         
-        cmd.extend([
-            # Bitrate settings (YouTube recommends 13.5 Mbps for 1440p)
-            "-b:v", "10000k",   # 10 Mbps target
-            "-maxrate", "12000k",  # Allow bursts up to 12 Mbps
-            "-bufsize", "16000k",  # 2 seconds of buffer at max rate
-            
-            # Frame rate and keyframe settings (CRITICAL FOR YOUTUBE)
-            "-r", "25",                     # 25 fps output
-            "-g", "50",                     # Keyframe every 2 seconds (25fps * 2)
-            "-keyint_min", "25",            # Minimum keyframe interval
-            "-sc_threshold", "0",           # Disable scene change detection
-            
-            # Audio settings
-            "-c:a", "aac", 
-            "-b:a", "128k",
-            "-ar", "44100",                 # Force audio sample rate
-            "-ac", "2",                     # Force stereo
-            
-            # Stream settings
-            "-f", "flv",
-            "-flvflags", "no_duration_filesize",
-            rtmp
-        ])
+        if not self.copy_video:
+            cmd.extend(VIDEO_RATE_ARGS)
+        cmd.extend(OUTPUT_ARGS)
+        cmd.append(rtmp)
         
         return cmd
 
     async def _log_ffmpeg_output(self):
-        """Monitor FFmpeg output in real-time and detect stream health"""
+        """Monitor FFmpeg progress (stdout) and log (stderr) output in real-time"""
         try:
-            while True:
-                line_bytes = await self.process.stdout.readline()
-                if not line_bytes:
-                    break
-                line = line_bytes.decode('utf-8', errors='ignore').strip()
-                if not line:
-                    continue
-                
-                # Update last activity time for ANY output
-                self.last_frame_time = time.time()
-                
-                # Check for RTMP errors indicating YouTube rejected stream
-                rtmp_error_indicators = [
-                    "Connection refused",
-                    "Server error",
-                    "RTMP error",
-                    "Failed to update header",
-                    "I/O error",
-                    "Broken pipe",
-                    "Connection reset",
-                    "Unable to write frame",
-                    "Cannot read RTMP handshake",
-                    "Connection timed out",
-                    "End of file",
-                    "Write error",
-                    "Input/output error"
-                ]
-                
-                if any(indicator.lower() in line.lower() for indicator in rtmp_error_indicators):
-                    self.error_count += 1
-                    self.rtmp_errors.append(line)
-                    log.error(f"FFmpeg RTMP ERROR ({self.error_count}): {line}")
-                    
-                    # If we get multiple RTMP errors, stream is likely rejected
-                    if self.error_count >= 3:
-                        log.error(f"❌ Multiple RTMP errors detected - YouTube likely rejected stream")
-                
-                # Log errors (but filter out recoverable ones)
-                elif "error" in line.lower() and not any(x in line.lower() for x in ["deprecated", "recoverable"]):
-                    log.error(f"FFmpeg ERROR: {line}")
-                # Log warnings (but reduce noise)
-                elif "warning" in line.lower():
-                    log.debug(f"FFmpeg WARNING: {line}")
-                # Progress indicators - extract frame count for stall detection
-                elif any(x in line.lower() for x in ["frame=", "fps=", "time=", "bitrate=", "speed="]):
-                    # Extract frame count to detect stalls
-                    frame_match = re.search(r'frame=\s*(\d+)', line)
-                    if frame_match:
-                        current_frame = int(frame_match.group(1))
-                        # Only update timestamp if frame count actually increased
-                        if current_frame > self.last_frame_count:
-                            self.last_frame_count = current_frame
-                            self.last_frame_count_time = time.time()
-                    
-                    # Only log progress every 30 seconds to reduce spam
-                    if not hasattr(self, '_last_progress_log'):
-                        self._last_progress_log = 0
-                    if time.time() - self._last_progress_log > 30:
-                        log.debug(f"FFmpeg progress: {line}")
-                        self._last_progress_log = time.time()
-                else:
-                    log.debug(f"FFmpeg: {line}")
+            await asyncio.gather(self._read_progress(), self._read_log())
         except Exception as e:
             log.error(f"Error monitoring FFmpeg output: {e}")
 
+    async def _read_progress(self):
+        """Collect -progress key=value lines into blocks; each block ends with progress=..."""
+        block = {}
+        while True:
+            line_bytes = await self.process.stdout.readline()
+            if not line_bytes:
+                break
+            key, sep, value = line_bytes.decode('ascii', errors='ignore').strip().partition('=')
+            if not sep:
+                continue
+            block[key] = value
+            if key == "progress":
+                try:
+                    self._handle_progress(block)
+                except Exception as e:
+                    log.error(f"Error handling FFmpeg progress: {e}")
+                block = {}
+
+    async def _read_log(self):
+        """Read FFmpeg's log output in chunks and handle it line by line.
+
+        Handler errors are logged rather than raised so the pipe keeps
+        draining; a stalled reader would let the pipe fill and block FFmpeg.
+        """
+        pending = b""
+        while True:
+            chunk = await self.process.stderr.read(LOG_READ_CHUNK)
+            if not chunk:
+                break
+            parts = LOG_LINE_SPLIT_RE.split(pending + chunk)
+            pending = parts.pop()
+            if len(pending) >= LOG_READ_CHUNK:
+                # No line break in a whole chunk's worth of output - flush it rather than buffer without bound
+                parts.append(pending)
+                pending = b""
+            for line_bytes in parts:
+                try:
+                    self._handle_ffmpeg_line(line_bytes)
+                except Exception as e:
+                    log.error(f"Error handling FFmpeg output: {e}")
+        if pending:
+            try:
+                self._handle_ffmpeg_line(pending)
+            except Exception as e:
+                log.error(f"Error handling FFmpeg output: {e}")
+
+    def _handle_progress(self, block):
+        """Update stall detection from one -progress block"""
+        now = time.monotonic()
+        self.last_frame_time = now
+        
+        # Only update timestamp if frame count actually increased
+        try:
+            current_frame = int(block.get("frame", 0))
+        except ValueError:
+            current_frame = 0
+        if current_frame > self.last_frame_count:
+            self.last_frame_count = current_frame
+            self.last_frame_count_time = now
+        
+        if block.get("progress") == "end":
+            log.warning(f"FFmpeg reported end of stream for {self.job}")
+        
+        # Only log progress every 30 seconds to reduce spam
+        if now - self._last_progress_log > 30:
+            log.debug(
+                "FFmpeg progress: frame=%s fps=%s bitrate=%s speed=%s",
+                block.get('frame'), block.get('fps'), block.get('bitrate'), block.get('speed')
+            )
+            self._last_progress_log = now
+
+    def _handle_ffmpeg_line(self, line_bytes):
+        """Classify one line of FFmpeg output and update health counters"""
+        line = line_bytes.decode('utf-8', errors='ignore').strip()
+        if not line:
+            return
+        low = line.lower()
+        
+        # Update last activity time for ANY output
+        self.last_frame_time = time.monotonic()
+        
+        # Check for RTMP errors indicating YouTube rejected stream
+        if RTMP_ERROR_RE.search(low):
+            self.error_count += 1
+            self.rtmp_errors.append(line)
+            log.error(f"FFmpeg RTMP ERROR ({self.error_count}): {line}")
+            
+            # If we get multiple RTMP errors, stream is likely rejected
+            if self.error_count >= 3:
+                log.error(f"❌ Multiple RTMP errors detected - YouTube likely rejected stream")
+        
+        # Log errors (but filter out recoverable ones)
+        elif "error" in low and "deprecated" not in low and "recoverable" not in low:
+            log.error(f"FFmpeg ERROR: {line}")
+        # Log warnings (but reduce noise)
+        elif "warning" in low:
+            log.debug("FFmpeg WARNING: %s", line)
+        else:
+            log.debug("FFmpeg: %s", line)
+
     async def start(self):
         if self.process and self.process.returncode is None:
             await self.stop()
         
         # Reset health monitoring counters
         self.error_count = 0
-        self.rtmp_errors = []
-        self.last_frame_time = time.time()
+        self.rtmp_errors.clear()
+        self.last_frame_time = time.monotonic()
         # Reset frame stall detection
         self.last_frame_count = 0
-        self.last_frame_count_time = time.time()
+        self.last_frame_count_time = time.monotonic()
             
-        cmd = self.build_cmd()
+        if settings.youtube_singlecam_copy:
+            await self.probe_source_codec()
+        cmd = self.cmd
         cam_str = ",".join(map(str, self.job.cameras))
         log.info(f"🎥 Starting stream for cams [{cam_str}]")
         
         # Print full command for debugging
-        full_cmd = ' '.join(cmd)
         log.info(f"📝 Full FFmpeg command:")
-        log.debug(full_cmd)
+        log.debug(self.cmd_str)
         
         try:
+            if self.cpus:
+                # taskset applies the mask before exec, so every FFmpeg thread inherits it
+                cmd = ["taskset", "-c", ",".join(map(str, self.cpus)), *cmd]
             self.process = await asyncio.create_subprocess_exec(
                 *cmd, 
-                stdout=asyncio.subprocess.PIPE, 
-                stderr=asyncio.subprocess.STDOUT,  # Redirect stderr to stdout
+                stdout=asyncio.subprocess.PIPE,  # -progress blocks
+                stderr=asyncio.subprocess.PIPE,  # Warnings/errors
                 start_new_session=True  # Create new process group so we can kill all children
             )
-            self.start_time = time.time()
+            self.start_time = time.monotonic()
             self.start_datetime = datetime.now() # Capture valid start time
             self.segment += 1
             
@@ -360,23 +593,13 @@ class YouTubeStreamer:
                     
             self.monitor_task.add_done_callback(handle_monitor_exception)
             
-            # Brief health check
-            await asyncio.sleep(5)
-            if self.process.returncode is not None:
+            # Brief health check - returns as soon as FFmpeg exits
+            if await self._exited_within(5):
                 log.error(f"❌ FFmpeg crashed immediately for cams [{cam_str}]")
                 return False
             
+            # Later deaths are picked up by the monitor loop, which wakes on process exit
             log.info(f"✅ Stream process started (PID: {self.process.pid}) Segment #{self.segment}")
-            log.info(f"⏳ Waiting 15 seconds for initial stream stabilization...")
-            
-            # Shorter initial wait - just enough for stream to stabilize
-            await asyncio.sleep(15)
-            
-            # Final check
-            if self.process.returncode is not None:
-                log.error(f"❌ FFmpeg died during initialization")
-                return False
-                
             log.info(f"✅ Stream initialized. YouTube should process it within 30-60 seconds.")
             log.info(f"💡 If stream doesn't appear on YouTube, it will auto-restart in next monitoring cycle")
                 
@@ -388,6 +611,14 @@ class YouTubeStreamer:
             log.error(f"❌ Failed to start stream: {e}")
             return False
 
+    async def _exited_within(self, timeout):
+        """Wait up to timeout seconds for FFmpeg to exit; True if it did"""
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
     async def stop(self):
         if not self.process:
             log.debug("stop() called but no process exists")
@@ -445,13 +676,15 @@ class YouTubeStreamer:
         return self.process and self.process.returncode is None
 
 
-    async def check_stream_health(self):
+    async def check_stream_health(self, now=None):
         """Check stream health without YouTube API"""
         if not await self.is_running():
             return False
+        if now is None:
+            now = time.monotonic()
         
         # Don't check health during initial startup (first 2 minutes)
-        if not self.start_time or (time.time() - self.start_time) < 120:
+        if not self.start_time or (now - self.start_time) < 120:
             return True  # Assume healthy during initialization
         
         # Method 1: Check for multiple RTMP errors
@@ -461,7 +694,7 @@ class YouTubeStreamer:
         
         # Method 2: Check if FFmpeg is stalled (no output for 2 minutes)
         if self.last_frame_time:
-            time_since_activity = time.time() - self.last_frame_time
+            time_since_activity = now - self.last_frame_time
             if time_since_activity > 120:  # 2 minutes
                 log.error(f"❌ Stream unhealthy: No FFmpeg activity for {int(time_since_activity)}s")
                 return False
@@ -469,7 +702,7 @@ class YouTubeStreamer:
         # Method 3: Check if frame count stopped increasing (encoding stalled)
         # This catches cases where FFmpeg is running but not encoding new frames
         if self.last_frame_count_time:
-            time_since_frame_increase = time.time() - self.last_frame_count_time
+            time_since_frame_increase = now - self.last_frame_count_time
             if time_since_frame_increase > 60:  # 60 seconds with no new frames
                 log.error(f"❌ Stream unhealthy: Frame count stuck at {self.last_frame_count} for {int(time_since_frame_increase)}s (encoding stalled)")
                 return False
@@ -505,33 +738,90 @@ class StreamManager:
             
             job = StreamJob(key, chunk)
             self.streamers.append(YouTubeStreamer(job))
-            log.info(f"Stream {i+1}: Cameras {chunk} -> Key ending ...{key[-4:]}")
+            log.info(f"Stream {i+1}: Cameras {chunk} -> Key ending ...{job.key_tail}")
             
         if available_cameras:
             log.warning(f"⚠️ Not enough keys for all cameras! Unassigned: {available_cameras}")
+        
+        if settings.youtube_stream_cpu_pinning and self.streamers:
+            self.assign_cpus()
+        elif len(self.streamers) > 1:
+            # Several encoders share the box - stop each from sizing its pool to every core
+            per_stream = max(2, len(os.sched_getaffinity(0)) // len(self.streamers))
+            for s in self.streamers:
+                s.threads = per_stream
+            log.info(f"🧵 {per_stream} encoder threads per stream")
             
         return True
 
+    def assign_cpus(self):
+        """Give each streamer a disjoint slice of the CPUs this process may run on"""
+        cpus = sorted(os.sched_getaffinity(0))
+        share = max(1, len(cpus) // len(self.streamers))
+        for i, s in enumerate(self.streamers):
+            start = (i * share) % len(cpus)
+            s.cpus = cpus[start:start + share]
+            s.threads = len(s.cpus)
+            log.info(f"📌 {s.job} pinned to CPUs {s.cpus}")
+
     async def monitor(self):
+        actions = []
+        now = time.monotonic()
         for s in self.streamers:
-            if not await s.is_running():
+            if s.next_retry_at:
+                # Waiting out a restart backoff
+                if now >= s.next_retry_at:
+                    s.next_retry_at = 0
+                    actions.append(s.start())
+            elif not await s.is_running():
                 log.warning(f"⚠️ Stream died: {s.job}")
-                log.info(f"🔄 Restarting stream in 10 seconds...")
-                await asyncio.sleep(10)
-                await s.start()
-            elif not await s.check_stream_health():
+                self._schedule_restart(s, now)
+            elif not await s.check_stream_health(now):
                 # YouTube rejected the stream or it's not live anymore
                 log.warning(f"⚠️ YouTube health check failed for {s.job}")
-                log.info(f"🔄 Restarting stream to recover...")
-                await s.stop()
-                await asyncio.sleep(10)
-                await s.start()
+                actions.append(s.stop())
+                self._schedule_restart(s, now)
             else:
-                # Periodic health log
-                if s.start_time and (time.time() - s.start_time) > 300:  # 5 minutes
-                    uptime_mins = int((time.time() - s.start_time) / 60)
+                if s.start_time and (now - s.start_time) > 300:  # 5 minutes
+                    # Stable again - forget earlier failures
+                    s.consecutive_failures = 0
+                    # Periodic health log
+                    uptime_mins = int((now - s.start_time) / 60)
                     if uptime_mins % 30 == 0:  # Log every 30 minutes
                         log.info(f"💚 Stream healthy: {s.job} - Uptime: {uptime_mins} minutes")
+        
+        # Stop/start streams together so one recovery doesn't hold up the others
+        if actions:
+            await asyncio.gather(*actions)
+
+    def _schedule_restart(self, s, now):
+        """Back off 10s, 20s, 40s, then 60s between restarts; pause 10 minutes after 5 failures in a row"""
+        s.consecutive_failures += 1
+        if s.consecutive_failures > 5:
+            delay = 600
+            log.error(f"❌ {s.job} failed {s.consecutive_failures - 1} times in a row - pausing restarts for 10 minutes")
+        else:
+            delay = min(60, 10 * 2 ** (s.consecutive_failures - 1))
+        log.info(f"🔄 Restarting stream in {delay} seconds...")
+        s.next_retry_at = now + delay
+
+    async def wait_for_exit(self, timeout, stop_event=None):
+        """Sleep until any stream process exits, stop_event is set, or timeout elapses"""
+        waiters = [
+            asyncio.ensure_future(s.process.wait())
+            for s in self.streamers
+            if s.process and s.process.returncode is None
+        ]
+        if stop_event is not None:
+            waiters.append(asyncio.ensure_future(stop_event.wait()))
+        if not waiters:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for w in waiters:
+                w.cancel()
 
     async def stop_all(self):
         for s in self.streamers:
@@ -542,22 +832,30 @@ class StreamManager:
 # ============================================
 
 async def wait_for_go2rtc():
-    import urllib.request
-    url = f"http://127.0.0.1:{settings.go2rtc_api_port}/api"
+    """Wait until the go2rtc API port accepts connections (up to 60s)"""
     log.info("⏳ Waiting for go2rtc...")
-    for i in range(60):
+    deadline = time.monotonic() + 60
+    delay = 0.05
+    while True:
         try:
-            await asyncio.to_thread(urllib.request.urlopen, url, timeout=2)
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection("127.0.0.1", settings.go2rtc_api_port), timeout=0.5
+            )
+            writer.close()
             log.info("✅ go2rtc ready")
             return True
-        except:
-            await asyncio.sleep(1)
+        except (OSError, asyncio.TimeoutError):
+            pass
+        if time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 1.0)
     log.error("❌ go2rtc not ready after 60s")
     return False
 
 async def main():
     log.info("=" * 50)
-    log.info("🎬 YouTube Streaming Service (Canvas-Based)")
+    log.info("🎬 YouTube Streaming Service (Grid-Based)")
     log.info("=" * 50)
     
     if not settings.youtube_live_enabled:
@@ -571,31 +869,32 @@ async def main():
     if not manager.discover_config():
         return
 
+    # Probe the encoder once off the event loop; build_cmd then hits the cache
+    await asyncio.to_thread(detect_hw_encoder)
+
     loop = asyncio.get_running_loop()
-    
-    async def shutdown():
-        log.info("🛑 Shutting down...")
-        await manager.stop_all()
-        loop.stop()
+    stop_event = asyncio.Event()
     
     for sig in (signal.SIGINT, signal.SIGTERM):
-        loop.add_signal_handler(sig, lambda: asyncio.create_task(shutdown()))
+        loop.add_signal_handler(sig, stop_event.set)
     
     # Initial start
     log.info("Starting all streams...")
-    for s in manager.streamers:
-        await s.start()
-        await asyncio.sleep(2)  # Stagger starts
+    await asyncio.gather(*(s.start() for s in manager.streamers))
         
     log.info("All streams started. Monitoring...")
         
     # Monitoring loop
     try:
-        while True:
+        while not stop_event.is_set():
             await manager.monitor()
-            await asyncio.sleep(10)
+            # Wake immediately when a stream dies or a signal arrives, otherwise re-check health every 10s
+            await manager.wait_for_exit(10, stop_event)
     except asyncio.CancelledError:
         pass
+    finally:
+        log.info("🛑 Shutting down...")
+        await manager.stop_all()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
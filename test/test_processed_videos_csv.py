@@ -0,0 +1,65 @@
+"""
+Mini-NVR Processed Videos CSV Tests
+
+Tests that legacy/short rows in processed_videos.csv are tolerated:
+1. Short rows read back padded to the full column count
+2. mark_uploaded rewrites them as complete rows
+3. get_pending_by_channel groups them without raising
+
+Run: pytest test/test_processed_videos_csv.py -v
+"""
+import pytest
+
+from utils import processed_videos_csv as pvc
+
+
+LEGACY_CSV = (
+    b"video_path,size_mb,upload_status\r\n"
+    b"ch1/2024-01-01/010000.ts,1.50\r\n"       # legacy 2-column row
+    b"ch2/2024-01-01/000000.ts,2.00\r\n"       # legacy 2-column row
+    b"ch1/2024-01-01/000000.ts,1.00,\r\n"      # current format, pending
+    b"ch2/2024-01-01/020000.ts,3.00,done\r\n"  # current format, uploaded
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    """processed_videos.csv in a temp dir, pre-filled with legacy rows."""
+    path = tmp_path / "processed_videos.csv"
+    path.write_bytes(LEGACY_CSV)
+    monkeypatch.setattr(pvc, "CSV_PATH", str(path))
+    return path
+
+
+class TestLegacyRows:
+    """Rows written with fewer than len(COLUMNS) fields."""
+
+    def test_read_pads_short_rows(self, csv_path):
+        rows = pvc._read_csv()
+        assert all(len(row) == len(pvc.COLUMNS) for row in rows)
+        assert rows[0] == ("ch1/2024-01-01/010000.ts", "1.50", "")
+
+    def test_get_pending_by_channel(self, csv_path):
+        assert pvc.get_pending_by_channel() == {
+            "ch1": [
+                ("ch1/2024-01-01/000000.ts", "1.00", ""),
+                ("ch1/2024-01-01/010000.ts", "1.50", ""),
+            ],
+            "ch2": [
+                ("ch2/2024-01-01/000000.ts", "2.00", ""),
+            ],
+        }
+
+    def test_mark_uploaded(self, csv_path):
+        pvc.mark_uploaded(["/recordings/ch1/2024-01-01/010000.ts"])
+
+        assert pvc.get_uploaded_videos() == [
+            "ch1/2024-01-01/010000.ts",
+            "ch2/2024-01-01/020000.ts",
+        ]
+        # The untouched legacy row is rewritten with all columns and stays pending
+        assert b"ch2/2024-01-01/000000.ts,2.00,\r\n" in csv_path.read_bytes()
+        assert pvc.get_pending_by_channel() == {
+            "ch1": [("ch1/2024-01-01/000000.ts", "1.00", "")],
+            "ch2": [("ch2/2024-01-01/000000.ts", "2.00", "")],
+        }
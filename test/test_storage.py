@@ -0,0 +1,111 @@
+"""
+Mini-NVR Storage Cleanup Tests
+
+Tests the oldest-first file selection used by storage cleanup:
+1. get_oldest_ts_files matches a sorted brute-force selection
+2. cleanup_old_files still frees the target when some deletes fail
+
+Run: pytest test/test_storage.py -v
+"""
+import logging
+import os
+import random
+
+import pytest
+
+from utils import storage
+
+
+@pytest.fixture
+def ts_tree(tmp_path):
+    """Recordings tree of .ts files with distinct mtimes; returns [(path, size, mtime)]."""
+    rng = random.Random(1234)
+    files = []
+    for i in range(40):
+        day = tmp_path / f"ch{i % 3 + 1}" / f"2024-01-{i % 5 + 1:02d}"
+        day.mkdir(parents=True, exist_ok=True)
+        path = day / f"{i:06d}.ts"
+        size = rng.randint(1, 4096)
+        path.write_bytes(b"x" * size)
+        mtime = 1_700_000_000 + rng.randrange(100_000) * 100 + i
+        os.utime(path, (mtime, mtime))
+        files.append((str(path), size, mtime))
+    # Non-.ts files are never selected
+    (tmp_path / "ch1" / "metadata_cache.json").write_text("{}")
+    return files
+
+
+def brute_force_oldest(files, target_bytes):
+    """Shortest oldest-first prefix whose sizes reach target_bytes (all files if they can't)."""
+    selected = []
+    total = 0
+    for path, size, _ in sorted(files, key=lambda f: f[2]):
+        if total >= target_bytes:
+            break
+        selected.append((path, size))
+        total += size
+    return selected
+
+
+class TestGetOldestTsFiles:
+    """Heap-based selection must equal sort-then-take-prefix."""
+
+    def test_matches_brute_force(self, tmp_path, ts_tree):
+        total = sum(size for _, size, _ in ts_tree)
+        for target in (0, 1, 100, 4096, total // 3, total // 2, total - 1, total, total * 2):
+            assert storage.get_oldest_ts_files(str(tmp_path), target) == brute_force_oldest(ts_tree, target)
+
+    def test_exclude(self, tmp_path, ts_tree):
+        oldest = sorted(ts_tree, key=lambda f: f[2])
+        exclude = {oldest[0][0], oldest[2][0]}
+        remaining = [f for f in ts_tree if f[0] not in exclude]
+        target = sum(size for _, size, _ in oldest[:6])
+        assert storage.get_oldest_ts_files(str(tmp_path), target, exclude=exclude) == brute_force_oldest(remaining, target)
+
+
+class TestCleanupOldFiles:
+    """Cleanup keeps going past files that cannot be removed."""
+
+    def test_progress_when_remove_fails(self, tmp_path, monkeypatch):
+        day = tmp_path / "ch1" / "2024-01-01"
+        day.mkdir(parents=True)
+        for i in range(10):
+            path = day / f"{i:06d}.ts"
+            path.write_bytes(b"x" * 1024)
+            os.utime(path, (1_700_000_000 + i, 1_700_000_000 + i))
+
+        # The two oldest segments are busy
+        busy = {str(day / "000000.ts"), str(day / "000001.ts")}
+        real_remove = os.remove
+
+        def remove(path):
+            if path in busy:
+                raise OSError("busy")
+            real_remove(path)
+
+        monkeypatch.setattr(storage.os, "remove", remove)
+
+        # 10 KiB stored against a 5 KiB limit; free 60% of the limit = 3 files
+        max_gb = 5 * 1024 / (1024 ** 3)
+        deleted = storage.cleanup_old_files(str(tmp_path), max_gb, logging.getLogger("test"), cleanup_percent=0.6)
+
+        assert deleted == 3
+        assert sorted(os.listdir(day)) == [
+            "000000.ts", "000001.ts", "000005.ts", "000006.ts",
+            "000007.ts", "000008.ts", "000009.ts",
+        ]
+
+    def test_stops_when_nothing_removable(self, tmp_path, monkeypatch):
+        day = tmp_path / "ch1" / "2024-01-01"
+        day.mkdir(parents=True)
+        for i in range(4):
+            (day / f"{i:06d}.ts").write_bytes(b"x" * 1024)
+
+        def remove(path):
+            raise OSError("read-only")
+
+        monkeypatch.setattr(storage.os, "remove", remove)
+
+        max_gb = 1024 / (1024 ** 3)
+        assert storage.cleanup_old_files(str(tmp_path), max_gb, logging.getLogger("test")) == 0
+        assert len(os.listdir(day)) == 4